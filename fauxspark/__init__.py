@@ -0,0 +1,4 @@
+from .models import Cluster
+from .simulation import Simulation
+
+__all__ = ["Cluster", "Simulation"]
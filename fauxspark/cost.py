@@ -0,0 +1,58 @@
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .scheduler import Scheduler
+
+GB = 1024 * 1024 * 1024
+# default $ per GB transferred across zones
+CROSS_AZ_PRICE = 0.02
+
+
+def wasted_tasks(scheduler: "Scheduler") -> list[Any]:
+    """
+    Launched tasks whose work was thrown away: killed attempts, and completed attempts
+    that were superseded because their output was lost and had to be recomputed.
+    """
+    acc = []
+    for stage in scheduler.DAG:
+        for task in stage.tasks:
+            for tid, launched_task in task.launched_tasks.items():
+                if launched_task.status != "completed" or tid != task.current:
+                    acc.append(launched_task)
+    return acc
+
+
+def breakdown(scheduler: "Scheduler", now: float, transfer_price: float) -> dict[str, Any]:
+    """
+    Per-run cost breakdown in dollars.
+
+    compute: executor lifetime billed at its hourly price
+    transfer: cross-AZ shuffle, broadcast & cached block bytes billed at transfer_price per GB
+    wasted: share of compute spent on killed or recomputed tasks
+    """
+    executors = scheduler.executors
+    compute = sum(
+        ((executor.end_time or now) - executor.start_time) / 3600 * executor.price
+        for executor in executors.values()
+    )
+    cross_az_bytes = sum(
+        nbytes for (src, dst), nbytes in scheduler.shuffle_bytes.items() if src != dst
+    )
+    transfer = cross_az_bytes / GB * transfer_price
+    wasted_core_seconds = 0.0
+    wasted = 0.0
+    for launched_task in wasted_tasks(scheduler):
+        executor = executors[launched_task.eid]
+        wasted_core_seconds += launched_task.runtime
+        wasted += launched_task.runtime / 3600 * executor.price / executor.cores
+    return {
+        "compute": compute,
+        "transfer": transfer,
+        "total": compute + transfer,
+        "wasted": wasted,
+        "wasted_core_seconds": wasted_core_seconds,
+        "cross_az_bytes": cross_az_bytes,
+        "shuffle_bytes": {
+            f"{src}->{dst}": nbytes for (src, dst), nbytes in scheduler.shuffle_bytes.items()
+        },
+    }
@@ -1,45 +1,150 @@
+import json
 import numpy as np
-from typing import Any
+from functools import lru_cache
+from typing import Any, Callable, Optional
 
+# a sampler draws raw (unnormalized) weights of the given shape from a distribution spec
+Sampler = Callable[[dict[Any, Any], tuple[int, ...], np.random.Generator], np.ndarray]
+
+DISTRIBUTIONS: dict[str, Sampler] = dict()
+# kinds whose weights do not depend on the rng, safe to memoize
+DETERMINISTIC: set[str] = set()
+
+
+def register(kind: str, deterministic: bool = False) -> Callable[[Sampler], Sampler]:
+    def decorator(func: Sampler) -> Sampler:
+        DISTRIBUTIONS[kind] = func
+        if deterministic:
+            DETERMINISTIC.add(kind)
+        return func
+
+    return decorator
+
+
+@lru_cache(maxsize=None)
+def load(path: str) -> np.ndarray:
+    """
+    Load rows of comma separated values from a file, always as a 2-D array.
+    """
+    data = np.loadtxt(path, delimiter=",", ndmin=2)
+    data.flags.writeable = False
+    return data
 
-def uniform(_: Any, n: int) -> np.ndarray:
-    w = np.ones(n)
-    w /= w.sum()
-    return w
 
+@register("uniform", deterministic=True)
+def uniform(_: Any, size: tuple[int, ...], rng: np.random.Generator) -> np.ndarray:
+    return np.ones(size)
 
-def zipf(dist: dict[Any, Any], n: int) -> np.ndarray:
+
+@register("zipf")
+def zipf(dist: dict[Any, Any], size: tuple[int, ...], rng: np.random.Generator) -> np.ndarray:
     alpha = dist["alpha"]
-    w = np.random.zipf(alpha, n)
-    w /= w.sum()
-    return w
+    return rng.zipf(alpha, size).astype(float)
 
 
-def normal(dist: dict[Any, Any], n: int) -> np.ndarray:
+@register("normal")
+def normal(dist: dict[Any, Any], size: tuple[int, ...], rng: np.random.Generator) -> np.ndarray:
     mu = dist["loc"]
     sigma = dist["scale"]
-    w = np.random.normal(mu, sigma, n)
-    w /= w.sum()
-    return w
+    return rng.normal(mu, sigma, size)
 
 
-def pareto(dist: dict[Any, Any], n: int) -> np.ndarray:
+@register("pareto")
+def pareto(dist: dict[Any, Any], size: tuple[int, ...], rng: np.random.Generator) -> np.ndarray:
     alpha = dist["alpha"]
-    w = np.random.pareto(alpha, n)
-    w /= w.sum()
-    return w
+    return rng.pareto(alpha, size)
 
 
-def exponential(dist: dict[Any, Any], n: int) -> np.ndarray:
+@register("exponential")
+def exponential(
+    dist: dict[Any, Any], size: tuple[int, ...], rng: np.random.Generator
+) -> np.ndarray:
     scale = dist["scale"]
-    w = np.random.exponential(scale, n)
-    w /= w.sum()
-    return w
+    return rng.exponential(scale, size)
+
 
+@register("empirical")
+def empirical(dist: dict[Any, Any], size: tuple[int, ...], rng: np.random.Generator) -> np.ndarray:
+    """
+    Resample observed partition sizes, given inline as "values" or as a "file" of values
+    (one per line or comma separated).
+    """
+    values = np.asarray(dist["values"]) if "values" in dist else load(dist["file"]).ravel()
+    if values.ndim != 1 or len(values) == 0:
+        raise ValueError(f"Invalid empirical distribution: {dist}")
+    return rng.choice(values, size=size, replace=True).astype(float)
 
-def weights(dist: dict[Any, Any], n: int) -> np.ndarray:
+
+@register("histogram")
+def histogram(dist: dict[Any, Any], size: tuple[int, ...], rng: np.random.Generator) -> np.ndarray:
+    """
+    Sample from a histogram, given inline as "edges" & "counts" or as a "file" with
+    rows of (lower, upper, count). A bin is picked by its count, then a value uniformly within it.
+    """
+    if "file" in dist:
+        rows = load(dist["file"])
+        if rows.shape[1] != 3:
+            raise ValueError(f"Invalid histogram file: {dist['file']}")
+        lower, upper, counts = rows[:, 0], rows[:, 1], rows[:, 2]
+    else:
+        edges = np.asarray(dist["edges"], dtype=float)
+        counts = np.asarray(dist["counts"], dtype=float)
+        if len(edges) != len(counts) + 1:
+            raise ValueError(f"Invalid histogram distribution: {dist}")
+        lower, upper = edges[:-1], edges[1:]
+    bins = rng.choice(len(counts), size=size, p=counts / counts.sum())
+    values: np.ndarray = rng.uniform(lower[bins], upper[bins])
+    return values
+
+
+def sampler(dist: dict[Any, Any]) -> Sampler:
     kind = dist["kind"]
-    func = globals().get(kind)
+    func = DISTRIBUTIONS.get(kind)
     if func is None:
         raise ValueError(f"Unknown distribution kind: {kind}")
-    return func(dist, n)
+    return func
+
+
+def normalize(w: np.ndarray) -> np.ndarray:
+    normalized: np.ndarray = w / w.sum(axis=-1, keepdims=True)
+    return normalized
+
+
+@lru_cache(maxsize=1024)
+def cached(key: str, n: int) -> np.ndarray:
+    dist = json.loads(key)
+    w = normalize(sampler(dist)(dist, (n,), np.random.default_rng()))
+    w.flags.writeable = False
+    return w
+
+
+def weights(
+    dist: dict[Any, Any],
+    n: int,
+    rng: Optional[np.random.Generator] = None,
+    cache: bool = False,
+) -> np.ndarray:
+    """
+    Draw n weights summing to 1. With cache=True, weights of deterministic kinds are memoized
+    and returned read-only.
+    """
+    func = sampler(dist)
+    if cache and dist["kind"] in DETERMINISTIC:
+        return cached(json.dumps(dist, sort_keys=True), n)
+    return normalize(func(dist, (n,), rng or np.random.default_rng()))
+
+
+def weights_batch(
+    dist: dict[Any, Any],
+    n: int,
+    runs: int,
+    rng: Optional[np.random.Generator] = None,
+    cache: bool = False,
+) -> np.ndarray:
+    """
+    Draw weights for many runs in one vectorized call, shape (runs, n); each row sums to 1.
+    """
+    func = sampler(dist)
+    if cache and dist["kind"] in DETERMINISTIC:
+        return np.broadcast_to(cached(json.dumps(dist, sort_keys=True), n), (runs, n))
+    return normalize(func(dist, (runs, n), rng or np.random.default_rng()))
@@ -1,9 +1,9 @@
 import typing
 import simpy
-from typing import Generator
+from collections import OrderedDict
+from typing import Generator, Optional
 from .models import Stage, LaunchTask, StatusUpdate, FetchFailed, KillTask
 from . import util
-from functools import partial
 from colorama import Fore, Style
 from typing import TYPE_CHECKING
 import humanfriendly as hf
@@ -11,6 +11,9 @@ import humanfriendly as hf
 if TYPE_CHECKING:
     from .scheduler import Scheduler
 
+# 48MB/s
+BANDWIDTH = 48 * 1024 * 1024
+
 
 class Executor(object):
     def __init__(
@@ -22,18 +25,35 @@ class Executor(object):
         queue: simpy.Store,
         scheduler_queue: simpy.Store,
         scheduler: "Scheduler",
+        instance_type: str = "default",
+        price: float = 0.0,
+        zone: str = "default",
+        memory: Optional[float] = None,
     ):
         self.env = env
         self.DAG = DAG
         self.id = id
         self.cores = cores
         self.cores_free = cores
-        self.logger = partial(util.log, env, f"executor-{self.id}")
+        self.logger = util.logger(env, f"executor-{self.id}", scheduler.verbose)
         self.queue = queue
         self.scheduler_queue = scheduler_queue
         self.scheduler = scheduler
+        self.instance_type = instance_type
+        self.price = price  # per hour
+        self.zone = zone
         self.taskprocs: dict[int, simpy.Process] = dict()
         self.fetchprocs: dict[int, simpy.Process] = dict()
+        # broadcasts are fetched once per executor and pinned in memory
+        self.broadcasts: dict[int, simpy.Process] = dict()
+        self.pinned = 0.0
+        # cached partitions by (stage id, partition), least recently used first
+        self.memory = memory
+        self.blocks: OrderedDict[tuple[int, int], float] = OrderedDict()
+        self.cached = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
         self.start_time = env.now
         self.end_time = None
         self.computed = 0
@@ -77,48 +97,98 @@ class Executor(object):
         start_time = self.env.now
         tid = launch_task.tid
         stage = launch_task.task.stage
+        index = launch_task.task.index
         try:
-            input_bytes = 0
-            if stage.input:
-                input_bytes = stage.input.splits[launch_task.task.index]
-            deps = stage.deps
-            for dep in deps:
-                if self.DAG[dep].status != "completed":
-                    self.queue.put(FetchFailed(tid=tid, dep=dep, eid=self.id))
-                    return
-                for task in self.DAG[dep].tasks:
-                    current = task.launched_tasks.get(task.current, None)  # type: ignore
-                    if current and (
-                        executor := self.scheduler.available_executors.get(current.eid, None)
-                    ):
-                        if current.eid == self.id:  # local fetch
-                            input_bytes += self.DAG[dep].output.splits[task.index][
-                                launch_task.task.index
-                            ]
-                            continue
-                        try:
-                            yield executor.fetch(tid, dep, task.index, launch_task.task.index)
-                        except simpy.Interrupt as e:
-                            if e.cause == "disconnect":
-                                self.queue.put(FetchFailed(tid=tid, dep=dep, eid=self.id))
-                                return
-                            raise e
-                    else:
-                        self.queue.put(FetchFailed(tid=tid, dep=dep, eid=self.id))
-                        return
-            self.logger(
-                f"[{stage.id}-{launch_task.task.index}] input bytes={hf.format_size(input_bytes)}"
-            )
+            input_bytes = yield from self.read(launch_task, stage, start_time)
+            if input_bytes is None:
+                return
+            self.logger(f"[{stage.id}-{index}] input bytes={hf.format_size(input_bytes)}")
             yield self.env.timeout(input_bytes / stage.throughput)
             self.computed += self.env.now - start_time
+            launch_task.runtime = self.env.now - start_time
+            if stage.cache:
+                self.cache((stage.id, index), stage.output_bytes(index))
             self.queue.put(StatusUpdate(tid=tid, status="completed", eid=self.id))
         except simpy.Interrupt as e:
             self.computed += self.env.now - start_time
+            launch_task.runtime = self.env.now - start_time
             if e.cause == "killed":
                 self.queue.put(StatusUpdate(tid=tid, status="killed", eid=self.id))
                 return
             raise e
 
+    def read(
+        self: "Executor", launch_task: LaunchTask, stage: Stage, start_time: float
+    ) -> Generator[typing.Any, None, Optional[float]]:
+        """
+        Read the input partition of the launched task from stage (the task's own stage, or the
+        cached stage being recomputed); returns its bytes, or None once a fetch failed.
+        """
+        index = launch_task.task.index
+        for b in stage.broadcast:
+            yield self.fetch_broadcast(b)
+        if stage.cached is not None:
+            return (yield from self.read_cached(launch_task, stage.cached, start_time))
+        if stage.input:
+            return float(stage.input.splits[index])
+        input_bytes = 0.0
+        for dep in stage.deps:
+            if self.DAG[dep].status != "completed":
+                self.fetch_failed(launch_task, dep, start_time)
+                return None
+            for task in self.DAG[dep].tasks:
+                current = task.launched_tasks.get(task.current, None)  # type: ignore
+                if current and (
+                    executor := self.scheduler.available_executors.get(current.eid, None)
+                ):
+                    if current.eid == self.id:  # local fetch
+                        input_bytes += self.DAG[dep].output.splits[task.index][index]
+                        continue
+                    try:
+                        yield executor.fetch(launch_task.tid, dep, task.index, index)
+                    except simpy.Interrupt as e:
+                        if e.cause == "disconnect":
+                            self.fetch_failed(launch_task, dep, start_time)
+                            return None
+                        raise e
+                    self.scheduler.account_shuffle(
+                        executor.zone, self.zone, self.DAG[dep].output.splits[task.index][index]
+                    )
+                else:
+                    self.fetch_failed(launch_task, dep, start_time)
+                    return None
+        return input_bytes
+
+    def read_cached(
+        self: "Executor", launch_task: LaunchTask, key: int, start_time: float
+    ) -> Generator[typing.Any, None, Optional[float]]:
+        block = (key, launch_task.task.index)
+        if holder := self.scheduler.block_location(block):
+            holder.touch(block)
+            self.hits += 1
+            nbytes = holder.blocks[block]
+            if holder.id != self.id:  # remote read
+                yield self.env.timeout(nbytes / BANDWIDTH)
+                self.scheduler.account_shuffle(holder.zone, self.zone, nbytes)
+            return nbytes
+        self.misses += 1
+        # recompute the partition from the lineage of the cached stage, and cache it again
+        source = self.DAG[key]
+        input_bytes = yield from self.read(launch_task, source, start_time)
+        if input_bytes is None:
+            return None
+        yield self.env.timeout(input_bytes / source.throughput)
+        nbytes = source.output_bytes(block[1])
+        self.cache(block, nbytes)
+        return nbytes
+
+    def fetch_failed(
+        self: "Executor", launch_task: LaunchTask, dep: int, start_time: float
+    ) -> None:
+        # the attempt held a core until now, including time spent on remote fetches
+        launch_task.runtime = self.env.now - start_time
+        self.queue.put(FetchFailed(tid=launch_task.tid, dep=dep, eid=self.id))
+
     def fetch(self: "Executor", tid: int, dep: int, sindex: int, dindex: int) -> simpy.Process:
         self.fetchprocs[tid] = self.env.process(self.fetchproc(dep, sindex, dindex))
         return self.fetchprocs[tid]
@@ -126,8 +196,49 @@ class Executor(object):
     def fetchproc(
         self: "Executor", dep: int, sindex: int, dindex: int
     ) -> Generator[typing.Any, None, None]:
-        # 48MB/s
-        yield self.env.timeout(self.DAG[dep].output.splits[sindex][dindex] / 48 * 1024 * 1024)
+        yield self.env.timeout(self.DAG[dep].output.splits[sindex][dindex] / BANDWIDTH)
+
+    def fetch_broadcast(self: "Executor", stage: int) -> simpy.Process:
+        if stage not in self.broadcasts:
+            self.broadcasts[stage] = self.env.process(self.broadcastproc(stage))
+        return self.broadcasts[stage]
+
+    def broadcastproc(self: "Executor", stage: int) -> Generator[typing.Any, None, None]:
+        nbytes = self.DAG[stage].output_bytes()
+        try:
+            yield self.env.timeout(nbytes / BANDWIDTH)
+        except simpy.Interrupt as e:
+            if e.cause == "killed":  # never pinned nor billed
+                return
+            raise e
+        # served by the driver
+        self.scheduler.account_shuffle(self.scheduler.zone, self.zone, nbytes)
+        self.pinned += nbytes
+        self.evict(0)
+
+    def touch(self: "Executor", block: tuple[int, int]) -> None:
+        self.blocks.move_to_end(block)
+
+    def evict(self: "Executor", nbytes: float) -> None:
+        """
+        Evict least recently used blocks until nbytes more fit in memory.
+        """
+        if self.memory is None:
+            return
+        while self.blocks and self.pinned + self.cached + nbytes > self.memory:
+            _, size = self.blocks.popitem(last=False)
+            self.cached -= size
+            self.evictions += 1
+
+    def cache(self: "Executor", block: tuple[int, int], nbytes: float) -> None:
+        if block in self.blocks:
+            self.touch(block)
+            return
+        if self.memory is not None and self.pinned + nbytes > self.memory:
+            return  # never fits
+        self.evict(nbytes)
+        self.blocks[block] = nbytes
+        self.cached += nbytes
 
     def kill(self: "Executor") -> None:
         for process in list(self.taskprocs.values()):
@@ -136,6 +247,9 @@ class Executor(object):
         for process in list(self.fetchprocs.values()):
             if process.is_alive:
                 process.interrupt("disconnect")
+        for process in list(self.broadcasts.values()):
+            if process.is_alive:
+                process.interrupt("killed")
         self.end_time = self.env.now
 
     def reserve(self: "Executor") -> None:
@@ -145,4 +259,4 @@ class Executor(object):
         self.cores_free += 1
 
     def __repr__(self: "Executor") -> str:
-        return f"{Fore.GREEN}Executor{Style.RESET_ALL}(id={self.id}, cores={self.cores}, available_slots={self.cores_free})"
+        return f"{Fore.GREEN}Executor{Style.RESET_ALL}(id={self.id}, cores={self.cores}, available_slots={self.cores_free}, zone={self.zone})"
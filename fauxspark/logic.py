@@ -11,11 +11,22 @@ def next_available_executor(executors: dict[int, Executor]) -> Optional[Executor
     return None
 
 
+def requirements(DAG: list[Stage], stage: Stage) -> list[int]:
+    """
+    Stages that must be completed before stage runs: its deps & broadcasts, and for a cached
+    read, the cached stage along with everything recomputing its partitions on a miss requires.
+    """
+    acc = stage.deps + stage.broadcast
+    if stage.cached is not None:
+        acc = acc + [stage.cached] + requirements(DAG, DAG[stage.cached])
+    return acc
+
+
 def runnable_tasks(DAG: list[Stage]) -> list[tuple[Stage, Task]]:
     acc: list[tuple[Stage, Task]] = []
     for stage in DAG:
         if stage.status != "completed" and all(
-            DAG[dep].status == "completed" for dep in stage.deps
+            DAG[dep].status == "completed" for dep in requirements(DAG, stage)
         ):
             for task in stage.tasks:
                 if task.status not in ["completed", "running"]:
@@ -2,113 +2,27 @@ import argparse
 import random
 import json
 import os
-import simpy
 from colorama import init, Fore, Style
-from .scheduler import Scheduler
-from .executor import Executor
-from .models import ExecutorKilled
-from . import util
-from typing import Generator, Any
+from .models import Cluster
+from .cost import CROSS_AZ_PRICE
+from .simulation import Simulation
+from .optimizer import search
+from typing import Any, Optional
 import sys
 import numpy as np
 
-util.LOG = False
 
+def load(file: str) -> list[dict[Any, Any]]:
+    with open(file, "r") as f:
+        dag: list[dict[Any, Any]] = json.load(f)
+        return dag
 
-def main(args: dict[str, Any], seed: int) -> None:
-    np.random.seed(seed)
-    try:
-        with open(args["file"], "r") as f:
-            DAG = util.init_dag(json.load(f))
-    except FileNotFoundError:
-        print(f"Error: DAG file {args['file']} not found")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in DAG file {args['file']}: {e}")
-        sys.exit(1)
-    env = simpy.Environment()
-    util.log(env, "main", f"random seed: {seed}")
-    util.log(env, "main", "fauxspark!")
-    scheduler = Scheduler(env, DAG)
-    util.log(env, "main", f"starting {args['executors']} executors...")
-
-    def mk_executor(i: int) -> Executor:
-        executor = Executor(
-            env=env,
-            DAG=DAG,
-            id=i,
-            cores=args["cores"],
-            queue=simpy.Store(env),
-            scheduler_queue=scheduler.scheduler_queue,
-            scheduler=scheduler,
-        )
-        return executor
-
-    def start_executors() -> None:
-        for i in range(args["executors"]):
-            executor = mk_executor(i)
-            executor.start()
-            scheduler.scheduler_queue.put(executor)
-
-    util.log(env, "main", "starting executors...")
-    start_executors()
-
-    util.log(env, "main", "starting scheduler")
-    scheduler.start()
-
-    last_eid = args["executors"]
-
-    def simulate_failure(eid: int, t: float) -> Generator[Any, None, None]:
-        yield env.timeout(t)
-        executor = scheduler.executors.get(eid, None)
-        if executor is None:
-            return
-        executor.kill()
-        scheduler.scheduler_queue.put(ExecutorKilled(eid=eid))
-        if args.get("auto_replace", False):
-            yield env.timeout(args["auto_replace_delay"])
-            nonlocal last_eid
-            executor = mk_executor(last_eid)
-            last_eid += 1
-            executor.start()
-            scheduler.scheduler_queue.put(executor)
-
-    def simulate_auto_replace(t: float) -> Generator[Any, None, None]:
-        yield env.timeout(t)
-        nonlocal last_eid
-        executor = mk_executor(last_eid)
-        last_eid += 1
-        executor.start()
-        scheduler.scheduler_queue.put(executor)
-
-    for eid, t in args.get("sf", []):
-        env.process(simulate_failure(eid, t))
-
-    for t in args.get("sa", []):
-        env.process(simulate_auto_replace(t))
-
-    env.run()
-    # stats
-    stats = {}
-    computed = sum([executor.computed for executor in scheduler.executors.values()])
-    total = sum(
-        [
-            ((executor.end_time or env.now) - executor.start_time) * executor.cores
-            for executor in scheduler.executors.values()
-        ]
-    )
-    eff = computed / total
-    stats["utilization"] = eff
-    stats["runtime"] = env.now
-    util.log(env, "main", f"{Fore.YELLOW}utilization: {eff}")
-    if all(stage.status == "completed" for stage in scheduler.DAG):
-        util.log(env, "main", f"{Fore.GREEN}job completed successfully")
-        util.log(env, "report", f"{Fore.WHITE}{json.dumps(stats)}")
-    else:
-        util.log(env, "main", f"{Fore.RED}job did not complete{Style.RESET_ALL}\n{DAG}")
-        for stage in scheduler.DAG:
-            util.log(env, "main", f"{stage.tasks!r}")
-    return stats
+
+def main(args: dict[str, Any], seed: int) -> dict[str, Any]:
+    simulation = Simulation(
+        load(args["file"]), Cluster.model_validate(args), verbose=args.get("verbose", False)
+    )
+    return simulation.run(seed)
 
 
 def cli() -> None:
@@ -186,6 +100,43 @@ def cli() -> None:
         help="Set the delay (in seconds) it takes to replace an executor on failure (default: 1).",
     )
 
+    parser.add_argument(
+        "--instance-type",
+        default="default",
+        type=str,
+        help="Set the instance type executors run on (default: default).",
+    )
+
+    parser.add_argument(
+        "--price",
+        default=0.0,
+        type=float,
+        help="Set the price (in $) of an executor instance per hour (default: 0).",
+    )
+
+    parser.add_argument(
+        "--zones",
+        nargs="+",
+        default=["default"],
+        type=str,
+        help="Specify availability zones; executors are placed across them round-robin.",
+    )
+
+    parser.add_argument(
+        "--cross-az-price",
+        default=CROSS_AZ_PRICE,
+        type=float,
+        help=f"Set the price (in $) per GB of shuffle data transferred across zones (default: {CROSS_AZ_PRICE}).",
+    )
+
+    parser.add_argument(
+        "-m",
+        "--memory",
+        default=None,
+        type=str,
+        help="Set the memory of each executor for cached & broadcast data, e.g. '4 GB' (default: unbounded).",
+    )
+
     parser.add_argument(
         "--seed",
         default=None,
@@ -193,43 +144,64 @@ def cli() -> None:
         help="Set the seed for the random number generator.",
     )
 
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Log every simulation event.",
+    )
+
     args = parser.parse_args()
     seed = args.seed or random.randint(0, 1000000)
-    main(args=vars(args), seed=seed)
+    try:
+        stats = main(args=vars(args), seed=seed)
+    except FileNotFoundError:
+        print(f"Error: DAG file {args.file} not found")
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in DAG file {args.file}: {e}")
+        sys.exit(1)
+    print(json.dumps(stats))
 
 
 if __name__ == "__main__":
     cli()
 
 
-def optimizer(waste: float, runtime: float) -> None:
+def optimizer(
+    waste: float,
+    runtime: float,
+    price: float = 0.0,
+    space: Optional[dict[str, list[Any]]] = None,
+    file: str = "./examples/simple/dag.json",
+    cluster: Optional[Cluster] = None,
+) -> list[dict[str, Any]]:
     """
-    Find the optimal number of cores to use to keep p90 runtime & waste below the desired thresholds.
+    Find the cheapest cluster configuration keeping p90 runtime & waste below the desired thresholds.
+    price: $ per core-hour
+    space: cluster field -> candidate values, e.g. {"executors": [1, 2], "cores": [1, 2]}
+    (default: 1 executor with 1 to 10 cores)
+    cluster: base configuration, e.g. Cluster(auto_replace=True, sf=[(0, 2.0)]) to replay a failure
     """
-    import random as rand
-    import numpy as np
-
-    init = random.randint(0, 1000000)
-    util.LOG = False
-
-    for cores in range(1, 11):
-        stats = []
-        rand.seed(init)  # reset seed for fairness
-        for _ in range(10000):  # 1000 sims per cores configuration
-            stat = main(
-                args={"executors": 1, "cores": cores, "file": "./examples/simple/dag.json"},
-                seed=rand.randint(0, 1000000),
-            )
-            stats.append(stat)
-        wastes = list(map(lambda x: 1 - x["utilization"], stats))
-        runtimes = list(map(lambda x: x["runtime"], stats))
-        w = np.percentile(wastes, 90)
-        r = np.percentile(runtimes, 90)
-        if r < runtime and w < waste:
-            print(
-                f"{Fore.GREEN}✅ candidate configuration: cores={cores} has given p90 waste {w} and p90 runtime {r}{Style.RESET_ALL}"
-            )
+    space = space or {"executors": [1], "cores": list(range(1, 11))}
+    reports = search(
+        load(file),
+        space,
+        waste,
+        runtime,
+        cluster=cluster,
+        price=price,
+        seed=random.randint(0, 1000000),
+    )
+    for report in reports:
+        config = ", ".join(f"{key}={report[key]}" for key in space)
+        w, r, c = report["waste"], report["runtime"], report["cost"]
+        summary = f"candidate configuration: {config} has given p90 waste {w}, p90 runtime {r} and p90 cost ${c} over {report['runs']} runs"
+        if report["verdict"] == "feasible":
+            print(f"{Fore.GREEN}✅ {summary}{Style.RESET_ALL}")
         else:
-            print(
-                f"{Fore.RED}👎 candidate configuration: cores={cores} has given p90 waste {w} and p90 runtime {r}{Style.RESET_ALL}"
-            )
+            print(f"{Fore.RED}👎 {summary} ({report['verdict']}){Style.RESET_ALL}")
+    if reports and reports[0]["verdict"] == "feasible":
+        config = ", ".join(f"{key}={reports[0][key]}" for key in space)
+        print(f"{Fore.GREEN}💰 cheapest configuration: {config} at p90 cost ${reports[0]['cost']}")
+    return reports
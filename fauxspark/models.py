@@ -3,6 +3,7 @@ from typing import Any, Optional
 from colorama import Fore, Style
 import numpy as np
 import humanfriendly as hf
+from .cost import CROSS_AZ_PRICE
 
 
 class Input(BaseModel):
@@ -38,6 +39,13 @@ class Stage(BaseModel):
     output: Optional[Output] = None
     tasks: list["Task"]
     throughput: float
+    # stages whose (whole) output is broadcast to every executor running this stage
+    broadcast: list[int] = Field(default_factory=list)
+    # persist the output partition of every task in executor memory
+    cache: bool = False
+    # read the cached output partitions of an earlier stage as input; a miss recomputes the
+    # partition from the lineage of the cached stage on top of this stage's own work
+    cached: Optional[int] = None
 
     @field_validator("throughput", mode="before")
     def validate_throughput(cls, v: Any) -> float:
@@ -47,6 +55,15 @@ class Stage(BaseModel):
             return hf.parse_size(v)
         raise ValueError(f"Invalid throughput: {v}")
 
+    def output_bytes(self: "Stage", index: Optional[int] = None) -> float:
+        """
+        Output bytes of the task at index (all its shuffle blocks), or of the whole stage.
+        """
+        if self.output is None or self.output.splits is None:
+            return 0.0
+        splits = self.output.splits if index is None else self.output.splits[index]
+        return float(np.sum(splits))
+
     def __repr__(self: "Stage") -> str:
         return f"{Fore.CYAN}Stage{Style.RESET_ALL}(id={self.id}, status={self.status}, deps={self.deps})"
 
@@ -67,6 +84,7 @@ class LaunchTask(BaseModel):
     eid: int
     task: "Task"
     status: str
+    runtime: float = 0.0
 
     def __repr__(self: "LaunchTask") -> str:
         return f"{Fore.YELLOW}LaunchTask{Style.RESET_ALL}(id={self.tid}, executor_id={self.eid}, status={self.status}, task={self.task!r})"
@@ -99,3 +117,27 @@ class ExecutorKilled(BaseModel):
 
     def __repr__(self: "ExecutorKilled") -> str:
         return f"{Fore.RED}ExecutorKilled{Style.RESET_ALL}(id={self.eid})"
+
+
+class Cluster(BaseModel):
+    executors: int = 1
+    cores: int = 1
+    instance_type: str = "default"
+    price: float = 0.0  # per executor-hour
+    # executors are placed round-robin, the driver runs in the first zone
+    zones: list[str] = Field(default_factory=lambda: ["default"])
+    cross_az_price: float = CROSS_AZ_PRICE  # per GB
+    memory: Optional[int] = None  # per executor for cached & broadcast data, unbounded if None
+    auto_replace: bool = False
+    auto_replace_delay: float = 1
+    # failures as (executor id, time) and autoscaling times
+    sf: list[tuple[int, float]] = Field(default_factory=list)
+    sa: list[float] = Field(default_factory=list)
+
+    @field_validator("memory", mode="before")
+    def validate_memory(cls, v: Any) -> Optional[int]:
+        if v is None or isinstance(v, int):
+            return v
+        if isinstance(v, str):
+            return hf.parse_size(v)
+        raise ValueError(f"Invalid memory: {v}")
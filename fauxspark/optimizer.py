@@ -0,0 +1,158 @@
+import itertools
+import math
+import numpy as np
+from statistics import NormalDist
+from typing import Any, Literal, Optional
+from .models import Cluster
+from .simulation import Simulation
+
+
+def quantile_bounds(samples: np.ndarray, q: float, z: float) -> tuple[float, float]:
+    """
+    Distribution-free confidence bounds on the q-quantile, read off the order statistics
+    (normal approximation to the binomial count of samples below the quantile).
+    """
+    n = len(samples)
+    s = np.sort(samples)
+    half = z * math.sqrt(n * q * (1 - q))
+    lo = max(math.floor(n * q - half), 0)
+    hi = min(math.ceil(n * q + half), n - 1)
+    return float(s[lo]), float(s[hi])
+
+
+class Arm(object):
+    """
+    A cluster configuration under evaluation, accumulating the metrics of its runs.
+    """
+
+    def __init__(self: "Arm", config: dict[str, Any], simulation: Simulation, seeds: list[int]):
+        self.config = config
+        self.simulation = simulation
+        self.seeds = seeds
+        self.wastes: list[float] = []
+        self.runtimes: list[float] = []
+        self.costs: list[float] = []
+        self.verdict: Optional[str] = None
+
+    @property
+    def runs(self: "Arm") -> int:
+        return len(self.runtimes)
+
+    def evaluate(self: "Arm", n: int, max_runtime: float) -> None:
+        """
+        Run until n runs were evaluated; runs exceeding max_runtime are aborted and count as
+        unbounded runtime & cost.
+        """
+        seeds = self.seeds[self.runs : n]
+        # every arm evaluates the same slices, hence draws the same batched splits
+        for stats in self.simulation.sweep(seeds, max_runtime=max_runtime, batch=len(seeds)):
+            aborted = stats["aborted"] is not None or not stats["completed"]
+            self.wastes.append(1 - stats["utilization"])
+            self.runtimes.append(math.inf if aborted else stats["runtime"])
+            self.costs.append(math.inf if aborted else stats["cost"]["total"])
+
+    def percentile(self: "Arm", metric: str, q: float) -> float:
+        values = np.array(getattr(self, metric))
+        # interpolating towards an aborted (unbounded) run is undefined
+        method: Literal["higher", "linear"] = "higher" if np.isinf(values).any() else "linear"
+        return float(np.percentile(values, q * 100, method=method))
+
+    def losing(self: "Arm", waste: float, runtime: float, q: float, z: float) -> bool:
+        """
+        Sequential test: the lower confidence bound of the q-quantile already misses a target.
+        """
+        w, _ = quantile_bounds(np.array(self.wastes), q, z)
+        r, _ = quantile_bounds(np.array(self.runtimes), q, z)
+        return w >= waste or r >= runtime
+
+    def score(self: "Arm", q: float) -> tuple[float, float, float]:
+        return (
+            self.percentile("costs", q),
+            self.percentile("wastes", q),
+            self.percentile("runtimes", q),
+        )
+
+    def report(self: "Arm", q: float) -> dict[str, Any]:
+        return {
+            **self.config,
+            "runs": self.runs,
+            "waste": self.percentile("wastes", q),
+            "runtime": self.percentile("runtimes", q),
+            "cost": self.percentile("costs", q),
+            "verdict": self.verdict,
+        }
+
+
+def search(
+    dag: list[dict[Any, Any]],
+    space: dict[str, list[Any]],
+    waste: float,
+    runtime: float,
+    cluster: Optional[Cluster] = None,
+    price: float = 0.0,
+    q: float = 0.9,
+    budget: int = 10000,
+    min_runs: int = 100,
+    eta: int = 2,
+    alpha: float = 0.01,
+    seed: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    """
+    Find the cheapest configuration in space (cluster field -> candidate values) whose
+    q-quantile runtime & waste stay below the targets.
+
+    Configurations are searched with successive halving: every rung evaluates the surviving
+    configurations on eta times more runs, keeping the cheapest 1/eta of them (ties broken by
+    waste, then runtime), until the full budget is reached. Runs are evaluated in batches of
+    min_runs, and a configuration is pruned as soon as the lower confidence bound of its quantile
+    misses a target. A configuration is tested after every batch, up to budget / min_runs times
+    on two metrics, so alpha (the chance of wrongly pruning a feasible configuration) is split
+    over all those looks (Bonferroni) to widen the bound. Runs are aborted once they exceed the
+    runtime target. All configurations replay the same seeds for fairness.
+
+    cluster: base configuration every candidate overrides, e.g. with failures (sf) to replay
+    price: $ per core-hour, applied on top of cluster
+    Returns a report per configuration, cheapest feasible first.
+    """
+    cluster = cluster or Cluster()
+    for key in space:
+        if key not in Cluster.model_fields:
+            raise ValueError(f"Unknown cluster field: {key}")
+    replaces = cluster.auto_replace or any(space.get("auto_replace", []))
+    fails = cluster.sf or any(space.get("sf", []))
+    if "auto_replace_delay" in space and not (replaces and fails):
+        raise ValueError("auto_replace_delay has no effect without auto_replace & failures (sf)")
+    looks = math.ceil(budget / min_runs)
+    z = NormalDist().inv_cdf(1 - alpha / (2 * looks))
+    seeds = np.random.default_rng(seed).integers(0, 1000000, budget).tolist()
+    arms = []
+    for values in itertools.product(*space.values()):
+        config = dict(zip(space.keys(), values))
+        c = cluster.model_copy(update=config)
+        c.price = c.price + price * c.cores
+        arms.append(Arm(config, Simulation(dag, c), seeds))
+
+    active = arms
+    n = min(min_runs, budget)
+    while True:
+        for arm in active:
+            while arm.runs < n and arm.verdict is None:
+                arm.evaluate(min(arm.runs + min_runs, n), max_runtime=runtime)
+                if arm.losing(waste, runtime, q, z):
+                    arm.verdict = "pruned"
+        active = [arm for arm in active if arm.verdict is None]
+        if n >= budget or not active:
+            break
+        if len(active) > 1:
+            active.sort(key=lambda arm: arm.score(q))
+            for arm in active[math.ceil(len(active) / eta) :]:
+                arm.verdict = "halved"
+            active = active[: math.ceil(len(active) / eta)]
+        n = min(n * eta, budget)
+
+    for arm in active:
+        feasible = arm.percentile("wastes", q) < waste and arm.percentile("runtimes", q) < runtime
+        arm.verdict = "feasible" if feasible else "infeasible"
+    order = {"feasible": 0, "infeasible": 1, "halved": 2, "pruned": 3}
+    arms.sort(key=lambda arm: (order[arm.verdict or "pruned"], arm.score(q)))
+    return [arm.report(q) for arm in arms]
@@ -1,8 +1,7 @@
-from typing import Generator
+from typing import Generator, Optional
 import typing
 import simpy
 from colorama import Fore
-from functools import partial
 from fauxspark.executor import Executor
 from .models import (
     Stage,
@@ -16,16 +15,27 @@ from . import util
 
 
 class Scheduler(object):
-    def __init__(self, env: simpy.Environment, DAG: list[Stage]):
+    def __init__(
+        self,
+        env: simpy.Environment,
+        DAG: list[Stage],
+        verbose: bool = False,
+        zone: str = "default",
+    ):
         self.env = env
         self.DAG = DAG
+        self.verbose = verbose
+        # zone of the driver, which serves broadcasts
+        self.zone = zone
         self.executors: dict[int, Executor] = dict()
         # tuple of dep (stage id) and partition (task index)
         self.shuffles: dict[(int, int), Executor] = dict()  # type: ignore
         self.scheduled: dict[int, LaunchTask] = dict()
+        # bytes transferred (shuffle, broadcast, cached blocks) by (source zone, destination zone)
+        self.shuffle_bytes: dict[tuple[str, str], float] = dict()
         self.scheduler_queue = simpy.Store(env)
         self.nextid: Generator[int, None, None] = util.nextidgen()
-        self.logger = partial(util.log, env, "scheduler")
+        self.logger = util.logger(env, "scheduler", verbose)
 
     def start(self: "Scheduler") -> simpy.Process:
         return self.env.process(self.loop())
@@ -74,6 +84,15 @@ class Scheduler(object):
             util.put(executor.queue, launch_task)
             executor.reserve()
 
+    def block_location(self: "Scheduler", block: tuple[int, int]) -> Optional[Executor]:
+        for executor in self.available_executors.values():
+            if block in executor.blocks:
+                return executor
+        return None
+
+    def account_shuffle(self: "Scheduler", src: str, dst: str, nbytes: float) -> None:
+        self.shuffle_bytes[(src, dst)] = self.shuffle_bytes.get((src, dst), 0.0) + nbytes
+
     def register_executor(self: "Scheduler", executor: Executor) -> None:
         self.executors[executor.id] = executor
 
@@ -0,0 +1,189 @@
+import itertools
+import time
+import simpy
+import numpy as np
+from simpy.core import Infinity
+from colorama import Fore, Style
+from typing import Any, Generator, Iterable, Optional
+from .scheduler import Scheduler
+from .executor import Executor
+from .models import Cluster, ExecutorKilled
+from . import util, cost
+
+
+class Simulation(object):
+    """
+    A job (topologically sorted list of stages, as in the DAG json) running on a cluster.
+
+    Holds no process-global state: every run builds its own environment, DAG & rng, so
+    simulations can run concurrently in threads or processes.
+    """
+
+    def __init__(
+        self: "Simulation",
+        dag: list[dict[Any, Any]],
+        cluster: Cluster,
+        verbose: bool = False,
+    ):
+        self.dag = dag
+        self.cluster = cluster
+        self.verbose = verbose
+
+    def run(
+        self: "Simulation",
+        seed: int,
+        max_runtime: Optional[float] = None,
+        timeout: Optional[float] = None,
+        weights: Optional[dict[tuple[int, str], np.ndarray]] = None,
+    ) -> dict[str, Any]:
+        """
+        Run the job once.
+
+        max_runtime: abort once the simulated runtime exceeds this bound
+        timeout: abort after this many wall-clock seconds
+        weights: pre-drawn splits weights (see util.batch_weights) instead of drawing from seed
+        """
+        cluster = self.cluster
+        DAG = util.init_dag(self.dag, np.random.default_rng(seed), weights)
+        env = simpy.Environment()
+        logger = util.logger(env, "main", self.verbose)
+        logger(f"random seed: {seed}")
+        logger("fauxspark!")
+        scheduler = Scheduler(env, DAG, self.verbose, zone=cluster.zones[0])
+        logger(f"starting {cluster.executors} executors...")
+
+        def mk_executor(i: int) -> Executor:
+            executor = Executor(
+                env=env,
+                DAG=DAG,
+                id=i,
+                cores=cluster.cores,
+                queue=simpy.Store(env),
+                scheduler_queue=scheduler.scheduler_queue,
+                scheduler=scheduler,
+                instance_type=cluster.instance_type,
+                price=cluster.price,
+                zone=cluster.zones[i % len(cluster.zones)],
+                memory=cluster.memory,
+            )
+            return executor
+
+        def start_executors() -> None:
+            for i in range(cluster.executors):
+                executor = mk_executor(i)
+                executor.start()
+                scheduler.scheduler_queue.put(executor)
+
+        logger("starting executors...")
+        start_executors()
+
+        logger("starting scheduler")
+        scheduler.start()
+
+        last_eid = cluster.executors
+
+        def simulate_failure(eid: int, t: float) -> Generator[Any, None, None]:
+            yield env.timeout(t)
+            executor = scheduler.executors.get(eid, None)
+            if executor is None:
+                return
+            executor.kill()
+            scheduler.scheduler_queue.put(ExecutorKilled(eid=eid))
+            if cluster.auto_replace:
+                yield env.timeout(cluster.auto_replace_delay)
+                nonlocal last_eid
+                executor = mk_executor(last_eid)
+                last_eid += 1
+                executor.start()
+                scheduler.scheduler_queue.put(executor)
+
+        def simulate_auto_replace(t: float) -> Generator[Any, None, None]:
+            yield env.timeout(t)
+            nonlocal last_eid
+            executor = mk_executor(last_eid)
+            last_eid += 1
+            executor.start()
+            scheduler.scheduler_queue.put(executor)
+
+        for eid, t in cluster.sf:
+            env.process(simulate_failure(eid, t))
+
+        for t in cluster.sa:
+            env.process(simulate_auto_replace(t))
+
+        aborted = self.step(env, max_runtime, timeout)
+        # stats
+        stats: dict[str, Any] = {}
+        computed = sum([executor.computed for executor in scheduler.executors.values()])
+        total = sum(
+            [
+                ((executor.end_time or env.now) - executor.start_time) * executor.cores
+                for executor in scheduler.executors.values()
+            ]
+        )
+        eff = computed / total if total else 0.0
+        completed = all(stage.status == "completed" for stage in scheduler.DAG)
+        stats["seed"] = seed
+        stats["utilization"] = eff
+        stats["runtime"] = env.now
+        stats["completed"] = completed
+        stats["aborted"] = aborted
+        stats["cost"] = cost.breakdown(scheduler, env.now, cluster.cross_az_price)
+        stats["cache"] = {
+            "hits": sum(executor.hits for executor in scheduler.executors.values()),
+            "misses": sum(executor.misses for executor in scheduler.executors.values()),
+            "evictions": sum(executor.evictions for executor in scheduler.executors.values()),
+        }
+        logger(f"{Fore.YELLOW}utilization: {eff}")
+        if completed:
+            logger(f"{Fore.GREEN}job completed successfully")
+        elif aborted:
+            logger(f"{Fore.RED}job aborted ({aborted}){Style.RESET_ALL}")
+        else:
+            logger(f"{Fore.RED}job did not complete{Style.RESET_ALL}\n{DAG}")
+            for stage in scheduler.DAG:
+                logger(f"{stage.tasks!r}")
+        return stats
+
+    @staticmethod
+    def step(
+        env: simpy.Environment, max_runtime: Optional[float], timeout: Optional[float]
+    ) -> Optional[str]:
+        """
+        Advance the environment until it runs dry or a stop condition hits; returns the
+        stop condition that aborted the run, if any.
+        """
+        if max_runtime is None and timeout is None:
+            env.run()
+            return None
+        deadline = time.monotonic() + timeout if timeout is not None else Infinity
+        while (t := env.peek()) != Infinity:
+            if max_runtime is not None and t > max_runtime:
+                return "max_runtime"
+            if timeout is not None and time.monotonic() > deadline:
+                return "timeout"
+            env.step()
+        return None
+
+    def sweep(
+        self: "Simulation",
+        seeds: Iterable[int],
+        max_runtime: Optional[float] = None,
+        timeout: Optional[float] = None,
+        batch: Optional[int] = None,
+    ) -> Generator[dict[str, Any], None, None]:
+        """
+        Stream the stats of one run per seed without accumulating them.
+
+        batch: draw the splits of this many runs at once, seeded by their seeds together;
+        reproducible for the same seeds & batch size, but a run no longer matches run(seed).
+        """
+        if batch is None:
+            for seed in seeds:
+                yield self.run(seed, max_runtime=max_runtime, timeout=timeout)
+            return
+        it = iter(seeds)
+        while chunk := list(itertools.islice(it, batch)):
+            weights = util.batch_weights(self.dag, len(chunk), np.random.default_rng(chunk))
+            for seed, w in zip(chunk, weights):
+                yield self.run(seed, max_runtime=max_runtime, timeout=timeout, weights=w)
@@ -1,21 +1,28 @@
-from typing import Any, Generator
+from typing import Any, Callable, Generator, Optional
 from colorama import Style, Fore
 from pydantic import TypeAdapter
 import simpy
+from functools import partial
 import numpy as np
 from fauxspark import dist
 from fauxspark.models import Stage, Task
 
-LOG = True
-
 
 def log(env: simpy.Environment, component: str, msg: str) -> None:
     hours = int(env.now // 3600)
     minutes = int((env.now % 3600) // 60)
     seconds = int(env.now % 60)
     time = f"{hours:02}:{minutes:02}:{seconds:02}"
-    if LOG:
-        print(f"{Style.BRIGHT}{Fore.RED}{time}{Style.RESET_ALL}: [{component:<12}] {msg} ")
+    print(f"{Style.BRIGHT}{Fore.RED}{time}{Style.RESET_ALL}: [{component:<12}] {msg} ")
+
+
+def logger(env: simpy.Environment, component: str, verbose: bool) -> Callable[[str], None]:
+    """
+    Logger bound to a simulation & component; a no-op unless verbose.
+    """
+    if verbose:
+        return partial(log, env, component)
+    return lambda _: None
 
 
 def nextidgen() -> Generator[int, None, None]:
@@ -29,18 +36,62 @@ def put(q: simpy.Store, event: Any) -> None:
     q.put(event)
 
 
-def init_dag(m) -> list[Stage]:
+def batch_weights(
+    m: list[dict[Any, Any]], runs: int, rng: Optional[np.random.Generator] = None
+) -> list[dict[tuple[int, str], np.ndarray]]:
+    """
+    Draw the input/output weights of many runs in one vectorized call per distribution.
+    Returns, per run, weights by (stage id, "input" | "output") to pass to init_dag.
+    """
+    rng = rng or np.random.default_rng()
+    drawn: dict[tuple[int, str], np.ndarray] = {}
+    for stage in TypeAdapter(list[Stage]).validate_python(m):
+        if stage.input:
+            drawn[(stage.id, "input")] = dist.weights_batch(
+                stage.input.distribution, stage.input.partitions, runs, rng, cache=True
+            )
+        if stage.output and stage.output.shuffle:
+            drawn[(stage.id, "output")] = dist.weights_batch(
+                stage.output.distribution, stage.output.partitions, runs, rng, cache=True
+            )
+    return [{key: w[i] for key, w in drawn.items()} for i in range(runs)]
+
+
+def init_dag(
+    m,
+    rng: Optional[np.random.Generator] = None,
+    weights: Optional[dict[tuple[int, str], np.ndarray]] = None,
+) -> list[Stage]:
     """
     m: topologically sorted list of stages
+    rng: generator used to draw input/output splits (one per run for reproducibility)
+    weights: pre-drawn weights of this run (see batch_weights), used instead of rng
     """
+    rng = rng or np.random.default_rng()
     dag = TypeAdapter(list[Stage]).validate_python(m)
+
+    def draw(stage: Stage, side: str) -> np.ndarray:
+        if weights is not None:
+            return weights[(stage.id, side)]
+        spec = stage.input if side == "input" else stage.output
+        return dist.weights(spec.distribution, spec.partitions, rng, cache=True)
+
     for stage in dag:
+        if stage.cached is not None:
+            if stage.cached >= stage.id:
+                raise ValueError(
+                    f"Stage {stage.id} reads stage {stage.cached} which must come earlier"
+                )
+            if not dag[stage.cached].cache:
+                raise ValueError(f"Stage {stage.id} reads stage {stage.cached} which is not cached")
+            if stage.input or stage.deps:
+                raise ValueError(
+                    f"Stage {stage.id} reads a cached stage and cannot have an input or deps"
+                )
         if stage.input:
-            stage.input.splits = (
-                dist.weights(stage.input.distribution, stage.input.partitions) * stage.input.size
-            )
+            stage.input.splits = draw(stage, "input") * stage.input.size
             if stage.output.shuffle:
-                w = dist.weights(stage.output.distribution, stage.output.partitions)
+                w = draw(stage, "output")
                 stage.output.splits = ((stage.input.splits * np.array(stage.ratio))[:, None]) * w
             else:
                 stage.output.splits = stage.input.splits * np.array(stage.ratio)
@@ -51,16 +102,24 @@ def init_dag(m) -> list[Stage]:
             #     f"s={stage.id} input shape: {stage.input.splits.shape} output shape: {stage.output.splits.shape}"
             # )
         else:
-            partitions = dag[stage.deps[0]].output.partitions
-            accumulated = np.sum(
-                [
-                    ratio * dag[dep].output.splits.sum(axis=0)
-                    for ratio, dep in zip(stage.ratio, stage.deps)
-                ],
-                axis=0,
-            )
+            if stage.cached is not None:
+                # a partition per task of the cached stage, holding the whole output of that task
+                source = dag[stage.cached]
+                partitions = len(source.tasks)
+                accumulated = stage.ratio[0] * np.array(
+                    [source.output_bytes(i) for i in range(partitions)]
+                )
+            else:
+                partitions = dag[stage.deps[0]].output.partitions
+                accumulated = np.sum(
+                    [
+                        ratio * dag[dep].output.splits.sum(axis=0)
+                        for ratio, dep in zip(stage.ratio, stage.deps)
+                    ],
+                    axis=0,
+                )
             if stage.output.shuffle:
-                w = dist.weights(stage.output.distribution, stage.output.partitions)
+                w = draw(stage, "output")
                 stage.output.splits = accumulated[:, None] * w
             else:
                 stage.output.splits = accumulated